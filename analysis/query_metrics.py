@@ -6,6 +6,23 @@ import sys
 from datetime import datetime, timedelta
 from typing import Optional
 
+# Rows pulled per fetchmany() call when streaming multi-row results
+FETCH_BATCH_SIZE = 1000
+
+
+def format_timestamp(ts: Optional[int]) -> str:
+    """Format a Unix epoch timestamp for display in local time.
+
+    Args:
+        ts: Seconds since the epoch, or None
+
+    Returns:
+        Formatted timestamp, or 'N/A' if ts is None
+    """
+    if ts is None:
+        return "N/A"
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d %H:%M:%S")
+
 
 class MetricsAnalyzer:
     """Analyze collected utilization metrics."""
@@ -23,7 +40,13 @@ class MetricsAnalyzer:
         """Connect to database."""
         try:
             self.conn = sqlite3.connect(self.db_path)
-            self.conn.row_factory = sqlite3.Row
+
+            # Read-side tuning: mmap the file, keep a 64MB page cache and
+            # hold temporary sort B-trees in memory
+            self.conn.execute("PRAGMA mmap_size=268435456")
+            self.conn.execute("PRAGMA cache_size=-65536")
+            self.conn.execute("PRAGMA temp_store=MEMORY")
+            self.conn.execute("PRAGMA query_only=ON")
         except sqlite3.Error as e:
             print(f"Error connecting to database: {e}")
             sys.exit(1)
@@ -56,9 +79,9 @@ class MetricsAnalyzer:
         print(f"{'Timestamp':<20} {'CPU %':<8} {'Memory %':<10} {'Load 1m':<10} {'Load 5m':<10}")
         print("-" * 70)
 
-        for row in cursor.fetchall():
-            print(f"{row['timestamp']:<20} {row['cpu_percent']:<8.1f} {row['memory_percent']:<10.1f} "
-                  f"{row['load_avg_1']:<10.2f} {row['load_avg_5']:<10.2f}")
+        fmt = "{:<20} {:<8.1f} {:<10.1f} {:<10.2f} {:<10.2f}".format
+        for ts, cpu, mem, load_1, load_5 in cursor:
+            print(fmt(format_timestamp(ts), cpu, mem, load_1, load_5))
 
     def get_peak_usage(self, hours: int = 24):
         """Find peak CPU and memory usage in the last N hours.
@@ -66,36 +89,48 @@ class MetricsAnalyzer:
         Args:
             hours: Number of hours to analyze
         """
-        cutoff = datetime.now() - timedelta(hours=hours)
+        cutoff = int((datetime.now() - timedelta(hours=hours)).timestamp())
         cursor = self.conn.cursor()
 
-        # Peak CPU
-        cursor.execute("""
-            SELECT timestamp, cpu_percent
-            FROM system_metrics
-            WHERE timestamp >= ?
-            ORDER BY cpu_percent DESC
-            LIMIT 1
-        """, (cutoff.isoformat(),))
-
-        peak_cpu = cursor.fetchone()
-
-        # Peak Memory
-        cursor.execute("""
-            SELECT timestamp, memory_percent
-            FROM system_metrics
-            WHERE timestamp >= ?
-            ORDER BY memory_percent DESC
-            LIMIT 1
-        """, (cutoff.isoformat(),))
-
-        peak_memory = cursor.fetchone()
+        # Windows of an hour or more read peaks from the per-minute rollup
+        if hours >= 1:
+            peaks = """
+                SELECT
+                    MAX(max_cpu) as peak_cpu,
+                    MAX(max_memory) as peak_memory
+                FROM system_metrics_1m
+                WHERE bucket >= :cutoff
+            """
+        else:
+            peaks = """
+                SELECT
+                    MAX(cpu_percent) as peak_cpu,
+                    MAX(memory_percent) as peak_memory
+                FROM system_metrics
+                WHERE timestamp >= :cutoff
+            """
+
+        # Peak CPU and memory in one pass, with the timestamp of each peak
+        cursor.execute(f"""
+            SELECT
+                peak_cpu,
+                peak_memory,
+                (SELECT timestamp FROM system_metrics
+                 WHERE cpu_percent = peak_cpu AND timestamp >= :cutoff
+                 LIMIT 1) as peak_cpu_time,
+                (SELECT timestamp FROM system_metrics
+                 WHERE memory_percent = peak_memory AND timestamp >= :cutoff
+                 LIMIT 1) as peak_memory_time
+            FROM ({peaks})
+        """, {'cutoff': cutoff})
+
+        peak_cpu, peak_memory, peak_cpu_time, peak_memory_time = cursor.fetchone()
 
         print(f"\n=== Peak Usage (Last {hours} hours) ===")
-        if peak_cpu:
-            print(f"Peak CPU: {peak_cpu['cpu_percent']:.1f}% at {peak_cpu['timestamp']}")
-        if peak_memory:
-            print(f"Peak Memory: {peak_memory['memory_percent']:.1f}% at {peak_memory['timestamp']}")
+        if peak_cpu is not None:
+            print(f"Peak CPU: {peak_cpu:.1f}% at {format_timestamp(peak_cpu_time)}")
+        if peak_memory is not None:
+            print(f"Peak Memory: {peak_memory:.1f}% at {format_timestamp(peak_memory_time)}")
 
     def get_average_usage(self, hours: int = 24):
         """Calculate average CPU and memory usage.
@@ -103,37 +138,58 @@ class MetricsAnalyzer:
         Args:
             hours: Number of hours to analyze
         """
-        cutoff = datetime.now() - timedelta(hours=hours)
+        cutoff = int((datetime.now() - timedelta(hours=hours)).timestamp())
         cursor = self.conn.cursor()
 
-        cursor.execute("""
-            SELECT
-                AVG(cpu_percent) as avg_cpu,
-                AVG(memory_percent) as avg_memory,
-                AVG(load_avg_1) as avg_load,
-                COUNT(*) as sample_count
-            FROM system_metrics
-            WHERE timestamp >= ?
-        """, (cutoff.isoformat(),))
-
-        row = cursor.fetchone()
+        # Windows of an hour or more are averaged from the rollups: per-minute
+        # buckets up to the first whole hour, hourly buckets from there on.
+        # Only whole minutes after the cutoff are counted
+        if hours >= 1:
+            hour_start = -(-cutoff // 3600) * 3600
+            cursor.execute("""
+                SELECT
+                    SUM(sum_cpu) / SUM(samples) as avg_cpu,
+                    SUM(sum_memory) / SUM(samples) as avg_memory,
+                    SUM(sum_load) / SUM(load_samples) as avg_load,
+                    COALESCE(SUM(samples), 0) as sample_count
+                FROM (
+                    SELECT sum_cpu, sum_memory, sum_load, load_samples, samples
+                    FROM system_metrics_1m
+                    WHERE bucket >= :cutoff AND bucket < :hour_start
+                    UNION ALL
+                    SELECT sum_cpu, sum_memory, sum_load, load_samples, samples
+                    FROM system_metrics_1h
+                    WHERE bucket >= :hour_start
+                )
+            """, {'cutoff': cutoff, 'hour_start': hour_start})
+        else:
+            cursor.execute("""
+                SELECT
+                    AVG(cpu_percent) as avg_cpu,
+                    AVG(memory_percent) as avg_memory,
+                    AVG(load_avg_1) as avg_load,
+                    COUNT(*) as sample_count
+                FROM system_metrics
+                WHERE timestamp >= ?
+            """, (cutoff,))
+
+        avg_cpu, avg_memory, avg_load, sample_count = cursor.fetchone()
 
         print(f"\n=== Average Usage (Last {hours} hours) ===")
-        print(f"Average CPU: {row['avg_cpu']:.1f}%")
-        print(f"Average Memory: {row['avg_memory']:.1f}%")
-        print(f"Average Load: {row['avg_load']:.2f}")
-        print(f"Samples: {row['sample_count']}")
+        print(f"Average CPU: {avg_cpu:.1f}%")
+        print(f"Average Memory: {avg_memory:.1f}%")
+        print(f"Average Load: {avg_load:.2f}")
+        print(f"Samples: {sample_count}")
 
     def get_disk_usage(self):
         """Show current disk usage for all partitions."""
         cursor = self.conn.cursor()
+        cursor.arraysize = FETCH_BATCH_SIZE
 
-        # Get latest timestamp
-        cursor.execute("SELECT MAX(timestamp) as latest FROM disk_metrics")
-        latest = cursor.fetchone()['latest']
-
+        # Latest snapshot in one statement; the timestamp rides along on each row
         cursor.execute("""
             SELECT
+                timestamp,
                 device,
                 mountpoint,
                 total,
@@ -141,24 +197,31 @@ class MetricsAnalyzer:
                 free,
                 percent
             FROM disk_metrics
-            WHERE timestamp = ?
+            WHERE timestamp = (SELECT MAX(timestamp) FROM disk_metrics)
             ORDER BY mountpoint
-        """, (latest,))
+        """)
 
-        print(f"\n=== Disk Usage (as of {latest}) ===")
+        rows = cursor.fetchmany()
+        latest = rows[0][0] if rows else None
+
+        print(f"\n=== Disk Usage (as of {format_timestamp(latest)}) ===")
         print(f"{'Mountpoint':<20} {'Device':<15} {'Total':<12} {'Used':<12} {'Free':<12} {'%':<6}")
         print("-" * 85)
 
-        for row in cursor.fetchall():
-            total_gb = row['total'] / (1024**3)
-            used_gb = row['used'] / (1024**3)
-            free_gb = row['free'] / (1024**3)
-            print(f"{row['mountpoint']:<20} {row['device']:<15} {total_gb:<12.1f} "
-                  f"{used_gb:<12.1f} {free_gb:<12.1f} {row['percent']:<6.1f}")
+        while rows:
+            for row in rows:
+                total_gb = row[3] / (1024**3)
+                used_gb = row[4] / (1024**3)
+                free_gb = row[5] / (1024**3)
+                print(f"{row[2]:<20} {row[1]:<15} {total_gb:<12.1f} "
+                      f"{used_gb:<12.1f} {free_gb:<12.1f} {row[6]:<6.1f}")
+            rows = cursor.fetchmany()
 
     def get_temperature_summary(self):
         """Show recent temperature readings."""
+        cutoff = int((datetime.now() - timedelta(hours=24)).timestamp())
         cursor = self.conn.cursor()
+        cursor.arraysize = FETCH_BATCH_SIZE
 
         cursor.execute("""
             SELECT
@@ -168,20 +231,22 @@ class MetricsAnalyzer:
                 MAX(current) as max_temp,
                 MIN(current) as min_temp
             FROM temperature_metrics
-            WHERE timestamp >= datetime('now', '-24 hours')
+            WHERE timestamp >= ?
             GROUP BY sensor_name, label
-        """)
+        """, (cutoff,))
 
-        rows = cursor.fetchall()
+        rows = cursor.fetchmany()
 
         if rows:
             print("\n=== Temperature Summary (Last 24 hours) ===")
             print(f"{'Sensor':<20} {'Label':<15} {'Avg °C':<10} {'Max °C':<10} {'Min °C':<10}")
             print("-" * 70)
 
-            for row in rows:
-                print(f"{row['sensor_name']:<20} {row['label']:<15} {row['avg_temp']:<10.1f} "
-                      f"{row['max_temp']:<10.1f} {row['min_temp']:<10.1f}")
+            while rows:
+                for row in rows:
+                    print(f"{row[0]:<20} {row[1]:<15} {row[2]:<10.1f} "
+                          f"{row[3]:<10.1f} {row[4]:<10.1f}")
+                rows = cursor.fetchmany()
         else:
             print("\n=== No temperature data available ===")
 
@@ -189,30 +254,23 @@ class MetricsAnalyzer:
         """Show summary of collected data."""
         cursor = self.conn.cursor()
 
-        # System metrics
+        # All summary figures in one round-trip
         cursor.execute("""
             SELECT
-                MIN(timestamp) as first_record,
-                MAX(timestamp) as last_record,
-                COUNT(*) as total_records
-            FROM system_metrics
+                (SELECT MIN(timestamp) FROM system_metrics) as first_record,
+                (SELECT MAX(timestamp) FROM system_metrics) as last_record,
+                (SELECT COUNT(*) FROM system_metrics) as total_records,
+                (SELECT COUNT(*) FROM disk_metrics) as disk_count,
+                (SELECT COUNT(*) FROM temperature_metrics) as temp_count
         """)
-        system = cursor.fetchone()
-
-        # Disk metrics
-        cursor.execute("SELECT COUNT(*) as count FROM disk_metrics")
-        disk = cursor.fetchone()
-
-        # Temperature metrics
-        cursor.execute("SELECT COUNT(*) as count FROM temperature_metrics")
-        temp = cursor.fetchone()
+        first_record, last_record, total_records, disk_count, temp_count = cursor.fetchone()
 
         print("\n=== Data Collection Summary ===")
-        print(f"First Record: {system['first_record']}")
-        print(f"Last Record: {system['last_record']}")
-        print(f"System Metrics: {system['total_records']} records")
-        print(f"Disk Metrics: {disk['count']} records")
-        print(f"Temperature Metrics: {temp['count']} records")
+        print(f"First Record: {format_timestamp(first_record)}")
+        print(f"Last Record: {format_timestamp(last_record)}")
+        print(f"System Metrics: {total_records} records")
+        print(f"Disk Metrics: {disk_count} records")
+        print(f"Temperature Metrics: {temp_count} records")
 
 
 def main():
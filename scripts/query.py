@@ -1,10 +1,174 @@
 #!/usr/bin/env python3
 """Query metrics from the database."""
 
+import atexit
 import sqlite3
 import sys
 import os
-from datetime import datetime, timedelta
+import threading
+from pathlib import Path
+
+# Byte counts are stored raw and scaled to GB only for display
+GB_PER_BYTE = 1.0 / 1073741824
+
+# Supported aggregation functions for windowed queries
+AGG_FUNCS = ('AVG', 'MAX')
+
+# ============================================================================
+# AGGREGATE QUERIES
+# ============================================================================
+# Built once per aggregation function so the SQL text is identical on every
+# call and the connection's prepared-statement cache is reused.
+
+_SYSTEM_AGG_SQL = {
+    agg_func: f"""
+        SELECT
+            datetime('now', 'localtime') as time,
+            {agg_func}(cpu_percent) as agg_cpu,
+            {agg_func}(memory_percent) as agg_memory,
+            {agg_func}(load_avg_1) as agg_load
+        FROM system_metrics
+        WHERE timestamp >= CAST(strftime('%s', 'now') AS INTEGER) - ?
+    """
+    for agg_func in AGG_FUNCS
+}
+
+_DISK_AGG_SQL = {
+    agg_func: f"""
+        SELECT
+            mountpoint,
+            {agg_func}(percent) as agg_percent,
+            {agg_func}(total) as agg_total,
+            {agg_func}(used) as agg_used,
+            {agg_func}(free) as agg_free
+        FROM disk_metrics
+        WHERE timestamp >= CAST(strftime('%s', 'now') AS INTEGER) - ?
+        GROUP BY mountpoint
+        ORDER BY mountpoint
+    """
+    for agg_func in AGG_FUNCS
+}
+
+_TEMPERATURE_AGG_SQL = {
+    agg_func: f"""
+        SELECT
+            sensor_name,
+            label,
+            {agg_func}(current) as agg_temperature
+        FROM temperature_metrics
+        WHERE timestamp >= CAST(strftime('%s', 'now') AS INTEGER) - ?
+        GROUP BY sensor_name, label
+        ORDER BY sensor_name, label
+    """
+    for agg_func in AGG_FUNCS
+}
+
+_GPU_AGG_SQL = {
+    agg_func: f"""
+        SELECT
+            gpu_index,
+            gpu_name,
+            {agg_func}(gpu_utilization) as agg_gpu,
+            {agg_func}(memory_utilization) as agg_mem,
+            {agg_func}(memory_used) as agg_mem_used,
+            {agg_func}(memory_total) as agg_mem_total,
+            {agg_func}(temperature) as agg_temp,
+            {agg_func}(power_draw) as agg_power,
+            {agg_func}(fan_speed) as agg_fan
+        FROM gpu_metrics
+        WHERE timestamp >= CAST(strftime('%s', 'now') AS INTEGER) - ?
+        GROUP BY gpu_index, gpu_name
+        ORDER BY gpu_index
+    """
+    for agg_func in AGG_FUNCS
+}
+
+# ============================================================================
+# LATEST-PER-KEY QUERIES
+# ============================================================================
+
+# Generated SQL keyed by (table, keys, cols)
+_LATEST_SQL = {}
+
+def _latest_query(table, keys, cols):
+    """Build the query returning every row from the newest sample of each key.
+
+    Joins the rows against the per-key MAX(timestamp), which the (key,
+    timestamp) index answers directly. Keys that appear more than once in a
+    sample (e.g. several 'unknown' sensor labels) keep all their rows.
+    """
+    cache_key = (table, keys, cols)
+    sql = _LATEST_SQL.get(cache_key)
+    if sql is None:
+        key_list = ', '.join(keys)
+        join_on = ' AND '.join(f"t.{key} = latest.{key}" for key in keys)
+        sql = (
+            f"SELECT {', '.join('t.' + col for col in keys + cols)} FROM {table} t "
+            f"INNER JOIN ("
+            f"SELECT {key_list}, MAX(timestamp) as latest_ts FROM {table} GROUP BY {key_list}"
+            f") latest ON {join_on} AND t.timestamp = latest.latest_ts "
+            f"ORDER BY {', '.join('t.' + key for key in keys)}"
+        )
+        _LATEST_SQL[cache_key] = sql
+    return sql
+
+# ============================================================================
+# CONNECTION MANAGEMENT
+# ============================================================================
+
+# Open connections keyed by database path, reused across query_metrics()
+# calls so the schema and prepared-statement cache stay warm. Each thread
+# has its own: fetch_all_metrics() holds a read transaction open across
+# several statements, which cannot be shared.
+_local = threading.local()
+
+class _ThreadConnections(dict):
+    """One thread's connections, closed as soon as the thread exits.
+
+    A connection is only freed by the cycle collector, so without this an
+    exited thread's file handles and page cache would linger.
+    """
+
+    def __del__(self):
+        for conn in self.values():
+            conn.close()
+
+def get_connection(db_path):
+    """Return the calling thread's connection for db_path, opening it on first use."""
+    connections = getattr(_local, 'connections', None)
+    if connections is None:
+        connections = _local.connections = _ThreadConnections()
+
+    conn = connections.get(db_path)
+    if conn is None:
+        # Open read-only so no write lock is ever taken. Only the owning
+        # thread queries it, but it may be closed during that thread's teardown
+        conn = sqlite3.connect(
+            Path(db_path).absolute().as_uri() + "?mode=ro",
+            uri=True,
+            cached_statements=256,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+
+        # Read-side tuning: mmap the file, keep a 64MB page cache and
+        # hold temporary sort B-trees in memory
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
+        conn.execute("PRAGMA temp_store=MEMORY")
+
+        connections[db_path] = conn
+    return conn
+
+def close_connections():
+    """Close the calling thread's cached connections; registered to run at process exit."""
+    connections = getattr(_local, 'connections', None)
+    if connections:
+        for conn in connections.values():
+            conn.close()
+        connections.clear()
+
+atexit.register(close_connections)
 
 # ============================================================================
 # DATABASE QUERY FUNCTIONS
@@ -16,25 +180,18 @@ def fetch_system_metrics(cursor, agg_minutes=None, agg_func='AVG'):
     Returns list of tuples: (time_label, cpu_percent, memory_percent, load_avg_1)
     """
     if agg_minutes:
-        cutoff_time = (datetime.now() - timedelta(minutes=agg_minutes)).isoformat()
-        cursor.execute(f"""
-            SELECT
-                datetime('now', 'localtime') as time,
-                {agg_func}(cpu_percent) as agg_cpu,
-                {agg_func}(memory_percent) as agg_memory,
-                {agg_func}(load_avg_1) as agg_load
-            FROM system_metrics
-            WHERE timestamp >= ?
-        """, (cutoff_time,))
+        window_seconds = agg_minutes * 60
+        cursor.execute(_SYSTEM_AGG_SQL[agg_func], (window_seconds,))
         row = cursor.fetchone()
-        if row:
+        # Aggregates over an empty window come back as a single all-NULL row
+        if row and row[1] is not None:
             return [row]
         else:
             return []
     else:
         cursor.execute("""
             SELECT
-                datetime(timestamp, 'localtime') as time,
+                datetime(timestamp, 'unixepoch', 'localtime') as time,
                 cpu_percent,
                 memory_percent,
                 load_avg_1
@@ -47,38 +204,17 @@ def fetch_system_metrics(cursor, agg_minutes=None, agg_func='AVG'):
 def fetch_disk_metrics(cursor, agg_minutes=None, agg_func='AVG'):
     """Fetch disk metrics from database.
 
-    Returns list of tuples: (mountpoint, used_percent, total_gb, used_gb, free_gb)
+    Returns list of tuples: (mountpoint, used_percent, total_bytes, used_bytes, free_bytes)
     """
     if agg_minutes:
-        cutoff_time = (datetime.now() - timedelta(minutes=agg_minutes)).isoformat()
-        cursor.execute(f"""
-            SELECT
-                mountpoint,
-                {agg_func}(percent) as agg_percent,
-                {agg_func}(total) / 1073741824.0 as agg_total_gb,
-                {agg_func}(used) / 1073741824.0 as agg_used_gb,
-                {agg_func}(free) / 1073741824.0 as agg_free_gb
-            FROM disk_metrics
-            WHERE timestamp >= ?
-            GROUP BY mountpoint
-            ORDER BY mountpoint
-        """, (cutoff_time,))
+        window_seconds = agg_minutes * 60
+        cursor.execute(_DISK_AGG_SQL[agg_func], (window_seconds,))
     else:
-        cursor.execute("""
-            SELECT
-                d.mountpoint,
-                d.percent as used_percent,
-                d.total / 1073741824.0 as total_gb,
-                d.used / 1073741824.0 as used_gb,
-                d.free / 1073741824.0 as free_gb
-            FROM disk_metrics d
-            INNER JOIN (
-                SELECT mountpoint, MAX(timestamp) as latest_ts
-                FROM disk_metrics
-                GROUP BY mountpoint
-            ) latest ON d.mountpoint = latest.mountpoint AND d.timestamp = latest.latest_ts
-            ORDER BY d.mountpoint
-        """)
+        cursor.execute(_latest_query(
+            'disk_metrics',
+            ('mountpoint',),
+            ('percent', 'total', 'used', 'free'),
+        ))
     return cursor.fetchall()
 
 def fetch_temperature_metrics(cursor, agg_minutes=None, agg_func='AVG'):
@@ -87,150 +223,160 @@ def fetch_temperature_metrics(cursor, agg_minutes=None, agg_func='AVG'):
     Returns list of tuples: (sensor_name, label, temperature_celsius)
     """
     if agg_minutes:
-        cutoff_time = (datetime.now() - timedelta(minutes=agg_minutes)).isoformat()
-        cursor.execute(f"""
-            SELECT
-                sensor_name,
-                label,
-                {agg_func}(current) as agg_temperature
-            FROM temperature_metrics
-            WHERE timestamp >= ?
-            GROUP BY sensor_name, label
-            ORDER BY sensor_name, label
-        """, (cutoff_time,))
+        window_seconds = agg_minutes * 60
+        cursor.execute(_TEMPERATURE_AGG_SQL[agg_func], (window_seconds,))
     else:
-        cursor.execute("""
-            SELECT
-                t.sensor_name,
-                t.label,
-                t.current as temperature_celsius
-            FROM temperature_metrics t
-            INNER JOIN (
-                SELECT sensor_name, label, MAX(timestamp) as latest_ts
-                FROM temperature_metrics
-                GROUP BY sensor_name, label
-            ) latest ON t.sensor_name = latest.sensor_name
-                AND t.label = latest.label
-                AND t.timestamp = latest.latest_ts
-            ORDER BY t.sensor_name, t.label
-        """)
+        cursor.execute(_latest_query(
+            'temperature_metrics',
+            ('sensor_name', 'label'),
+            ('current',),
+        ))
     return cursor.fetchall()
 
 def fetch_gpu_metrics(cursor, agg_minutes=None, agg_func='AVG'):
     """Fetch GPU metrics from database.
 
     Returns list of tuples: (gpu_index, gpu_name, gpu_utilization, memory_utilization,
-                             memory_used_gb, memory_total_gb, temperature, power_draw, fan_speed)
+                             memory_used_bytes, memory_total_bytes, temperature, power_draw, fan_speed)
     """
     if agg_minutes:
-        cutoff_time = (datetime.now() - timedelta(minutes=agg_minutes)).isoformat()
-        cursor.execute(f"""
-            SELECT
-                gpu_index,
-                gpu_name,
-                {agg_func}(gpu_utilization) as agg_gpu,
-                {agg_func}(memory_utilization) as agg_mem,
-                {agg_func}(memory_used) / 1073741824.0 as agg_mem_used_gb,
-                {agg_func}(memory_total) / 1073741824.0 as agg_mem_total_gb,
-                {agg_func}(temperature) as agg_temp,
-                {agg_func}(power_draw) as agg_power,
-                {agg_func}(fan_speed) as agg_fan
-            FROM gpu_metrics
-            WHERE timestamp >= ?
-            GROUP BY gpu_index, gpu_name
-            ORDER BY gpu_index
-        """, (cutoff_time,))
+        window_seconds = agg_minutes * 60
+        cursor.execute(_GPU_AGG_SQL[agg_func], (window_seconds,))
     else:
-        cursor.execute("""
-            SELECT
-                g.gpu_index,
-                g.gpu_name,
-                g.gpu_utilization,
-                g.memory_utilization,
-                g.memory_used / 1073741824.0 as memory_used_gb,
-                g.memory_total / 1073741824.0 as memory_total_gb,
-                g.temperature,
-                g.power_draw,
-                g.fan_speed
-            FROM gpu_metrics g
-            INNER JOIN (
-                SELECT gpu_index, MAX(timestamp) as latest_ts
-                FROM gpu_metrics
-                GROUP BY gpu_index
-            ) latest ON g.gpu_index = latest.gpu_index AND g.timestamp = latest.latest_ts
-            ORDER BY g.gpu_index
-        """)
+        cursor.execute(_latest_query(
+            'gpu_metrics',
+            ('gpu_index',),
+            ('gpu_name', 'gpu_utilization', 'memory_utilization', 'memory_used',
+             'memory_total', 'temperature', 'power_draw', 'fan_speed'),
+        ))
     return cursor.fetchall()
 
+def fetch_all_metrics(conn, agg_minutes=None, agg_func='AVG'):
+    """Fetch all metric groups inside a single read transaction.
+
+    Taking the shared lock once keeps the four SELECTs on one snapshot and
+    avoids acquiring and releasing it per statement.
+
+    Returns tuple: (system_data, disk_data, temp_data, gpu_data)
+    """
+    if agg_func not in AGG_FUNCS:
+        raise ValueError(f"Invalid aggregation function '{agg_func}'. Must be AVG or MAX.")
+
+    cursor = conn.cursor()
+    cursor.execute("BEGIN")
+    try:
+        return (
+            fetch_system_metrics(cursor, agg_minutes, agg_func),
+            fetch_disk_metrics(cursor, agg_minutes, agg_func),
+            fetch_temperature_metrics(cursor, agg_minutes, agg_func),
+            fetch_gpu_metrics(cursor, agg_minutes, agg_func),
+        )
+    finally:
+        conn.commit()
+
 # ============================================================================
 # DISPLAY FUNCTIONS
 # ============================================================================
 
+# Table headers and %-style row formats, built once at import
+SYSTEM_HEADER = (
+    "=== System Metrics ===\n"
+    f"{'Time':<20} {'CPU %':<9} {'Memory %':<11} {'Load 1m':<8}\n"
+    + "-" * 50
+)
+SYSTEM_ROW_FMT = "%-20s %-9.1f %-11.1f %-8.2f"
+
+DISK_HEADER = (
+    "\n=== Disk Metrics (Latest) ===\n"
+    f"{'Mount Point':<25} {'Used %':<9} {'Total GB':<11} {'Used GB':<11} {'Free GB':<11}\n"
+    + "-" * 70
+)
+DISK_ROW_FMT = "%-25s %-9.1f %-11.1f %-11.1f %-11.1f"
+
+TEMPERATURE_HEADER = (
+    "\n=== Temperature Metrics (Latest) ===\n"
+    f"{'Sensor':<20} {'Label':<25} {'Temperature (°C)':<17}\n"
+    + "-" * 60
+)
+TEMPERATURE_ROW_FMT = "%-20s %-25s %-17.1f"
+
+GPU_HEADER = (
+    "\n=== GPU Metrics (Latest) ===\n"
+    f"{'GPU':<5} {'Name':<28} {'GPU %':<8} {'Mem %':<8} {'Memory (GB)':<15} {'Temp (°C)':<12} {'Power (W)':<12} {'Fan %':<8}\n"
+    + "-" * 100
+)
+GPU_ROW_FMT = "%-5s %-28s %-8.1f %-8.1f %-15s %-12s %-12s %-8s"
+
+def _fmt_optional(value, spec):
+    """Format value with spec, or return 'N/A' for a missing reading."""
+    return spec % value if value is not None else "N/A"
+
 def print_system_metrics(data):
     """Print system metrics.
 
     Expects list of tuples: (time_label, cpu_percent, memory_percent, load_avg_1)
     """
-    print("=== System Metrics ===")
-    print(f"{'Time':<20} {'CPU %':<9} {'Memory %':<11} {'Load 1m':<8}")
-    print("-" * 50)
+    if not data:
+        sys.stdout.write("No system metrics found\n")
+        return
 
-    if data:
-        for row in data:
-            print(f"{row[0]:<20} {row[1]:<9.1f} {row[2]:<11.1f} {row[3]:<8.2f}")
-    else:
-        print("No system metrics found")
+    lines = [SYSTEM_HEADER]
+    lines.extend(map(SYSTEM_ROW_FMT.__mod__, data))
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def print_disk_metrics(data):
     """Print disk metrics.
 
-    Expects list of tuples: (mountpoint, used_percent, total_gb, used_gb, free_gb)
+    Expects list of tuples: (mountpoint, used_percent, total_bytes, used_bytes, free_bytes)
     """
-    print("\n=== Disk Metrics (Latest) ===")
-    print(f"{'Mount Point':<25} {'Used %':<9} {'Total GB':<11} {'Used GB':<11} {'Free GB':<11}")
-    print("-" * 70)
+    if not data:
+        sys.stdout.write("\nNo disk metrics found\n")
+        return
 
-    if data:
-        for row in data:
-            print(f"{row[0]:<25} {row[1]:<9.1f} {row[2]:<11.1f} {row[3]:<11.1f} {row[4]:<11.1f}")
-    else:
-        print("No disk metrics found")
+    lines = [DISK_HEADER]
+    lines.extend(
+        DISK_ROW_FMT % (mountpoint, percent, total * GB_PER_BYTE, used * GB_PER_BYTE, free * GB_PER_BYTE)
+        for mountpoint, percent, total, used, free in data
+    )
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def print_temperature_metrics(data):
     """Print temperature metrics.
 
     Expects list of tuples: (sensor_name, label, temperature_celsius)
     """
-    print("\n=== Temperature Metrics (Latest) ===")
-    print(f"{'Sensor':<20} {'Label':<25} {'Temperature (°C)':<17}")
-    print("-" * 60)
+    if not data:
+        sys.stdout.write("\nNo temperature metrics found\n")
+        return
 
-    if data:
-        for row in data:
-            print(f"{row[0]:<20} {row[1]:<25} {row[2]:<17.1f}")
-    else:
-        print("No temperature metrics found")
+    lines = [TEMPERATURE_HEADER]
+    lines.extend(map(TEMPERATURE_ROW_FMT.__mod__, data))
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def print_gpu_metrics(data):
     """Print GPU metrics.
 
     Expects list of tuples: (gpu_index, gpu_name, gpu_utilization, memory_utilization,
-                             memory_used_gb, memory_total_gb, temperature, power_draw, fan_speed)
+                             memory_used_bytes, memory_total_bytes, temperature, power_draw, fan_speed)
     """
-    print("\n=== GPU Metrics (Latest) ===")
-    print(f"{'GPU':<5} {'Name':<28} {'GPU %':<8} {'Mem %':<8} {'Memory (GB)':<15} {'Temp (°C)':<12} {'Power (W)':<12} {'Fan %':<8}")
-    print("-" * 100)
-
-    if data:
-        for row in data:
-            gpu_idx, gpu_name, gpu_util, mem_util, mem_used_gb, mem_total_gb, temp, power, fan = row
-            memory_str = f"{mem_used_gb:.1f}/{mem_total_gb:.1f}"
-            temp_str = f"{temp:.0f}" if temp is not None else "N/A"
-            power_str = f"{power:.1f}" if power is not None else "N/A"
-            fan_str = f"{fan:.0f}" if fan is not None else "N/A"
-            print(f"{gpu_idx:<5} {gpu_name:<28} {gpu_util:<8.1f} {mem_util:<8.1f} {memory_str:<15} {temp_str:<12} {power_str:<12} {fan_str:<8}")
-    else:
-        print("No GPU metrics found")
+    if not data:
+        sys.stdout.write("\nNo GPU metrics found\n")
+        return
+
+    lines = [GPU_HEADER]
+    lines.extend(
+        GPU_ROW_FMT % (gpu_idx, gpu_name, gpu_util, mem_util,
+                       "%.1f/%.1f" % (mem_used * GB_PER_BYTE, mem_total * GB_PER_BYTE),
+                       _fmt_optional(temp, "%.0f"),
+                       _fmt_optional(power, "%.1f"),
+                       _fmt_optional(fan, "%.0f"))
+        for gpu_idx, gpu_name, gpu_util, mem_util, mem_used, mem_total, temp, power, fan in data
+    )
+
+    sys.stdout.write("\n".join(lines) + "\n")
 
 # ============================================================================
 # MAIN QUERY FUNCTION
@@ -239,16 +385,12 @@ def print_gpu_metrics(data):
 def query_metrics(db_path, agg_minutes=None, agg_func='AVG'):
     """Query and display recent metrics."""
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
+        conn = get_connection(db_path)
 
         # Fetch all data
-        system_data = fetch_system_metrics(cursor, agg_minutes, agg_func)
-        disk_data = fetch_disk_metrics(cursor, agg_minutes, agg_func)
-        temp_data = fetch_temperature_metrics(cursor, agg_minutes, agg_func)
-        gpu_data = fetch_gpu_metrics(cursor, agg_minutes, agg_func)
-
-        conn.close()
+        system_data, disk_data, temp_data, gpu_data = fetch_all_metrics(
+            conn, agg_minutes, agg_func
+        )
 
         # Display all data
         print_system_metrics(system_data)
@@ -276,7 +418,7 @@ if __name__ == "__main__":
     agg_func = sys.argv[3].upper() if len(sys.argv) > 3 else 'AVG'
 
     # Validate aggregation function
-    if agg_func not in ['AVG', 'MAX']:
+    if agg_func not in AGG_FUNCS:
         print(f"Error: Invalid aggregation function '{agg_func}'. Must be AVG or MAX.", file=sys.stderr)
         sys.exit(1)
 
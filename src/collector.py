@@ -2,9 +2,18 @@
 
 import psutil
 import logging
+import time
 from datetime import datetime
 from typing import Dict, List, Optional
 
+from database import SystemMetricsRow, DiskMetricsRow, TemperatureMetricsRow, GpuMetricsRow
+
+# Seconds to reuse the mounted-partition list before re-reading the mount table
+PARTITION_CACHE_SECONDS = 60
+
+# Shortest window psutil needs between CPU reads for a meaningful percentage
+CPU_PRIME_SECONDS = 0.1
+
 # Try to import GPU libraries
 try:
     import pynvml
@@ -21,26 +30,63 @@ class MetricsCollector:
         self.logger = logging.getLogger(__name__)
         self.nvidia_initialized = False
 
+        # (monotonic time of last refresh, partitions) for collect_disk_metrics
+        self._partitions_cache = (None, [])
+
+        # Prime psutil's CPU counters so the first non-blocking read has a
+        # baseline; the first collection waits out CPU_PRIME_SECONDS from here
+        psutil.cpu_percent(interval=None)
+        self._cpu_primed_at = time.monotonic()
+
         # Try to initialize NVIDIA GPU monitoring
         if NVIDIA_GPU_AVAILABLE:
             try:
                 pynvml.nvmlInit()
                 self.nvidia_initialized = True
                 self.gpu_count = pynvml.nvmlDeviceGetCount()
+
+                # Handles and names are fixed for the life of the process
+                self._gpu_handles = [
+                    pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(self.gpu_count)
+                ]
+                self._gpu_names = []
+                for handle in self._gpu_handles:
+                    name = pynvml.nvmlDeviceGetName(handle)
+                    if isinstance(name, bytes):
+                        name = name.decode('utf-8')
+                    self._gpu_names.append(name)
+
                 self.logger.info(f"NVIDIA GPU monitoring initialized: {self.gpu_count} GPU(s) detected")
             except Exception as e:
                 self.logger.warning(f"Failed to initialize NVIDIA GPU monitoring: {e}")
                 self.nvidia_initialized = False
 
-    def collect_system_metrics(self) -> Dict:
+    def collect_system_metrics(self, timestamp: Optional[int] = None) -> SystemMetricsRow:
         """Collect CPU, memory, and load average metrics.
 
+        Args:
+            timestamp: Unix epoch seconds to stamp the sample with; defaults to now
+
         Returns:
-            Dictionary containing system metrics
+            System metrics sample in system_metrics column order
         """
         try:
-            # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
+            # Checked once per call; debug messages are only built when enabled
+            debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+
+            if timestamp is None:
+                timestamp = int(time.time())
+
+            # The first reading after startup would otherwise cover only the
+            # few milliseconds since the counters were primed
+            if self._cpu_primed_at is not None:
+                remaining = CPU_PRIME_SECONDS - (time.monotonic() - self._cpu_primed_at)
+                if remaining > 0:
+                    time.sleep(remaining)
+                self._cpu_primed_at = None
+
+            # CPU metrics (utilization since the previous call, no blocking sample)
+            cpu_percent = psutil.cpu_percent(interval=None)
             cpu_count = psutil.cpu_count()
 
             # Load average (Unix-like systems only)
@@ -54,41 +100,52 @@ class MetricsCollector:
             memory = psutil.virtual_memory()
             swap = psutil.swap_memory()
 
-            metrics = {
-                'timestamp': datetime.now().isoformat(),
-                'cpu_percent': cpu_percent,
-                'cpu_count': cpu_count,
-                'load_avg_1': load_avg_1,
-                'load_avg_5': load_avg_5,
-                'load_avg_15': load_avg_15,
-                'memory_total': memory.total,
-                'memory_available': memory.available,
-                'memory_percent': memory.percent,
-                'memory_used': memory.used,
-                'swap_total': swap.total,
-                'swap_used': swap.used,
-                'swap_percent': swap.percent
-            }
-
-            self.logger.debug(f"Collected system metrics: CPU={cpu_percent}%, Memory={memory.percent}%")
+            metrics = SystemMetricsRow(
+                timestamp=timestamp,
+                cpu_percent=cpu_percent,
+                cpu_count=cpu_count,
+                load_avg_1=load_avg_1,
+                load_avg_5=load_avg_5,
+                load_avg_15=load_avg_15,
+                memory_total=memory.total,
+                memory_available=memory.available,
+                memory_percent=memory.percent,
+                memory_used=memory.used,
+                swap_total=swap.total,
+                swap_used=swap.used,
+                swap_percent=swap.percent
+            )
+
+            if debug_enabled:
+                self.logger.debug(f"Collected system metrics: CPU={cpu_percent}%, Memory={memory.percent}%")
             return metrics
 
         except Exception as e:
             self.logger.error(f"Error collecting system metrics: {e}")
             raise
 
-    def collect_disk_metrics(self) -> List[Dict]:
+    def collect_disk_metrics(self, timestamp: Optional[int] = None) -> List[DiskMetricsRow]:
         """Collect disk usage metrics for all mounted partitions.
 
+        Args:
+            timestamp: Unix epoch seconds to stamp the sample with; defaults to now
+
         Returns:
-            List of dictionaries containing disk metrics
+            List of disk metrics samples
         """
         try:
-            timestamp = datetime.now().isoformat()
+            debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+
+            if timestamp is None:
+                timestamp = int(time.time())
             disk_metrics = []
 
-            # Get all disk partitions
-            partitions = psutil.disk_partitions(all=False)
+            # Get all disk partitions, re-reading the mount table at most once a minute
+            now = time.monotonic()
+            refreshed_at, partitions = self._partitions_cache
+            if refreshed_at is None or now - refreshed_at >= PARTITION_CACHE_SECONDS:
+                partitions = psutil.disk_partitions(all=False)
+                self._partitions_cache = (now, partitions)
 
             for partition in partitions:
                 try:
@@ -98,20 +155,21 @@ class MetricsCollector:
 
                     usage = psutil.disk_usage(partition.mountpoint)
 
-                    metrics = {
-                        'timestamp': timestamp,
-                        'device': partition.device,
-                        'mountpoint': partition.mountpoint,
-                        'total': usage.total,
-                        'used': usage.used,
-                        'free': usage.free,
-                        'percent': usage.percent
-                    }
+                    metrics = DiskMetricsRow(
+                        timestamp=timestamp,
+                        device=partition.device,
+                        mountpoint=partition.mountpoint,
+                        total=usage.total,
+                        used=usage.used,
+                        free=usage.free,
+                        percent=usage.percent
+                    )
 
                     disk_metrics.append(metrics)
-                    self.logger.debug(
-                        f"Collected disk metrics for {partition.mountpoint}: {usage.percent}% used"
-                    )
+                    if debug_enabled:
+                        self.logger.debug(
+                            f"Collected disk metrics for {partition.mountpoint}: {usage.percent}% used"
+                        )
 
                 except PermissionError:
                     self.logger.warning(f"Permission denied accessing {partition.mountpoint}")
@@ -124,14 +182,20 @@ class MetricsCollector:
             self.logger.error(f"Error collecting disk metrics: {e}")
             raise
 
-    def collect_temperature_metrics(self) -> List[Dict]:
+    def collect_temperature_metrics(self, timestamp: Optional[int] = None) -> List[TemperatureMetricsRow]:
         """Collect temperature sensor metrics if available.
 
+        Args:
+            timestamp: Unix epoch seconds to stamp the sample with; defaults to now
+
         Returns:
-            List of dictionaries containing temperature metrics
+            List of temperature metrics samples
         """
         try:
-            timestamp = datetime.now().isoformat()
+            debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+
+            if timestamp is None:
+                timestamp = int(time.time())
             temp_metrics = []
 
             # Try to get temperature sensors
@@ -140,18 +204,19 @@ class MetricsCollector:
                 if temps:
                     for sensor_name, entries in temps.items():
                         for entry in entries:
-                            metrics = {
-                                'timestamp': timestamp,
-                                'sensor_name': sensor_name,
-                                'label': entry.label or 'unknown',
-                                'current': entry.current,
-                                'high': entry.high if entry.high else None,
-                                'critical': entry.critical if entry.critical else None
-                            }
-                            temp_metrics.append(metrics)
-                            self.logger.debug(
-                                f"Temperature {sensor_name}/{entry.label}: {entry.current}°C"
+                            metrics = TemperatureMetricsRow(
+                                timestamp=timestamp,
+                                sensor_name=sensor_name,
+                                label=entry.label or 'unknown',
+                                current=entry.current,
+                                high=entry.high if entry.high else None,
+                                critical=entry.critical if entry.critical else None
                             )
+                            temp_metrics.append(metrics)
+                            if debug_enabled:
+                                self.logger.debug(
+                                    f"Temperature {sensor_name}/{entry.label}: {entry.current}°C"
+                                )
                 else:
                     self.logger.debug("No temperature sensors found")
             except AttributeError:
@@ -165,77 +230,87 @@ class MetricsCollector:
             self.logger.error(f"Error collecting temperature metrics: {e}")
             return []
 
-    def collect_gpu_metrics(self) -> List[Dict]:
+    def collect_gpu_metrics(self, timestamp: Optional[int] = None) -> List[GpuMetricsRow]:
         """Collect GPU utilization and metrics if available.
 
+        Args:
+            timestamp: Unix epoch seconds to stamp the sample with; defaults to now
+
         Returns:
-            List of dictionaries containing GPU metrics
+            List of GPU metrics samples
         """
         try:
-            timestamp = datetime.now().isoformat()
+            debug_enabled = self.logger.isEnabledFor(logging.DEBUG)
+
+            if timestamp is None:
+                timestamp = int(time.time())
             gpu_metrics = []
 
             # NVIDIA GPUs
             if self.nvidia_initialized:
-                try:
-                    for i in range(self.gpu_count):
-                        handle = pynvml.nvmlDeviceGetHandleByIndex(i)
-
-                        # Get GPU name
-                        name = pynvml.nvmlDeviceGetName(handle)
-                        if isinstance(name, bytes):
-                            name = name.decode('utf-8')
+                # Bind the per-tick NVML calls once rather than per GPU
+                nvml_error = pynvml.NVMLError
+                get_utilization = pynvml.nvmlDeviceGetUtilizationRates
+                get_memory = pynvml.nvmlDeviceGetMemoryInfo
+                get_temperature = pynvml.nvmlDeviceGetTemperature
+                get_power = pynvml.nvmlDeviceGetPowerUsage
+                get_power_limit = pynvml.nvmlDeviceGetPowerManagementLimit
+                get_fan_speed = pynvml.nvmlDeviceGetFanSpeed
+                temperature_sensor = pynvml.NVML_TEMPERATURE_GPU
 
+                try:
+                    for i, (handle, name) in enumerate(zip(self._gpu_handles, self._gpu_names)):
                         # Get utilization
-                        utilization = pynvml.nvmlDeviceGetUtilizationRates(handle)
+                        utilization = get_utilization(handle)
 
                         # Get memory info
-                        memory = pynvml.nvmlDeviceGetMemoryInfo(handle)
+                        memory = get_memory(handle)
 
                         # Get temperature
                         try:
-                            temperature = pynvml.nvmlDeviceGetTemperature(handle, pynvml.NVML_TEMPERATURE_GPU)
-                        except:
+                            temperature = get_temperature(handle, temperature_sensor)
+                        except nvml_error:
                             temperature = None
 
                         # Get power usage
                         try:
-                            power = pynvml.nvmlDeviceGetPowerUsage(handle) / 1000.0  # Convert mW to W
-                        except:
+                            power = get_power(handle) / 1000.0  # Convert mW to W
+                        except nvml_error:
                             power = None
 
                         # Get power limit
                         try:
-                            power_limit = pynvml.nvmlDeviceGetPowerManagementLimit(handle) / 1000.0
-                        except:
+                            power_limit = get_power_limit(handle) / 1000.0
+                        except nvml_error:
                             power_limit = None
 
                         # Get fan speed
                         try:
-                            fan_speed = pynvml.nvmlDeviceGetFanSpeed(handle)
-                        except:
+                            fan_speed = get_fan_speed(handle)
+                        except nvml_error:
                             fan_speed = None
 
-                        metrics = {
-                            'timestamp': timestamp,
-                            'gpu_index': i,
-                            'gpu_name': name,
-                            'gpu_utilization': utilization.gpu,
-                            'memory_utilization': utilization.memory,
-                            'memory_total': memory.total,
-                            'memory_used': memory.used,
-                            'memory_free': memory.free,
-                            'temperature': temperature,
-                            'power_draw': power,
-                            'power_limit': power_limit,
-                            'fan_speed': fan_speed
-                        }
+                        metrics = GpuMetricsRow(
+                            timestamp=timestamp,
+                            gpu_index=i,
+                            gpu_name=name,
+                            gpu_utilization=utilization.gpu,
+                            memory_utilization=utilization.memory,
+                            memory_total=memory.total,
+                            memory_used=memory.used,
+                            memory_free=memory.free,
+                            temperature=temperature,
+                            power_draw=power,
+                            power_limit=power_limit,
+                            fan_speed=fan_speed
+                        )
 
                         gpu_metrics.append(metrics)
-                        self.logger.debug(
-                            f"GPU {i} ({name}): {utilization.gpu}% utilization, "
-                            f"{memory.used / memory.total * 100:.1f}% memory, {temperature}°C"
-                        )
+                        if debug_enabled:
+                            self.logger.debug(
+                                f"GPU {i} ({name}): {utilization.gpu}% utilization, "
+                                f"{memory.used / memory.total * 100:.1f}% memory, {temperature}°C"
+                            )
 
                 except Exception as e:
                     self.logger.warning(f"Error reading NVIDIA GPU metrics: {e}")
@@ -3,8 +3,18 @@
 import yaml
 import logging
 import os
+import pickle
 from typing import Dict, Any
 
+# Use the libyaml C parser when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
+
+# Marks a key that was looked up and not found, so misses are cached too
+_MISSING = object()
+
 
 class Config:
     """Handles configuration loading and validation."""
@@ -17,6 +27,7 @@ class Config:
         """
         self.config_path = config_path
         self.config: Dict[str, Any] = {}
+        self._cache: Dict[str, Any] = {}
         self.logger = logging.getLogger(__name__)
 
         if not config_path or not os.path.exists(config_path):
@@ -30,8 +41,17 @@ class Config:
     def load_config(self):
         """Load configuration from YAML file."""
         try:
-            with open(self.config_path, 'r') as f:
-                self.config = yaml.safe_load(f)
+            st = os.stat(self.config_path)
+            cache_key = (st.st_mtime_ns, st.st_size)
+
+            config = self._read_parse_cache(cache_key)
+            if config is None:
+                with open(self.config_path, 'r') as f:
+                    config = yaml.load(f, Loader=_SafeLoader)
+                self._write_parse_cache(cache_key, config)
+
+            self.config = config
+            self._cache.clear()
 
             if not self.config:
                 raise ValueError("Configuration file is empty")
@@ -45,6 +65,43 @@ class Config:
             self.logger.error(f"Error loading config file: {e}")
             raise
 
+    def _read_parse_cache(self, cache_key):
+        """Return the pickled parse of the config file if it is still current.
+
+        Args:
+            cache_key: (mtime_ns, size) of the config file as it is now
+
+        Returns:
+            Parsed configuration, or None if there is no usable cache
+        """
+        try:
+            with open(self.config_path + '.cache', 'rb') as f:
+                cached_key, config = pickle.load(f)
+        except Exception:
+            return None
+
+        return config if cached_key == cache_key else None
+
+    def _write_parse_cache(self, cache_key, config):
+        """Pickle the parsed config next to the YAML file, best effort.
+
+        Args:
+            cache_key: (mtime_ns, size) of the config file that was parsed
+            config: Parsed configuration
+        """
+        cache_path = self.config_path + '.cache'
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump((cache_key, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            self.logger.debug(f"Could not write config cache {cache_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
     def _construct_paths(self):
         """Construct full paths from base directory."""
         import os
@@ -72,6 +129,7 @@ class Config:
         # Construct full paths
         self.config['database']['path'] = os.path.join(data_dir, db_filename)
         self.config['logging']['path'] = os.path.join(log_dir, log_filename)
+        self._cache.clear()
 
     def get(self, key: str, default=None):
         """Get configuration value.
@@ -83,16 +141,32 @@ class Config:
         Returns:
             Configuration value
         """
-        keys = key.split('.')
+        # Config is fixed after load, so each dotted path is walked only once
+        try:
+            value = self._cache[key]
+        except KeyError:
+            value = self._cache[key] = self._lookup(key)
+
+        return default if value is _MISSING else value
+
+    def _lookup(self, key: str):
+        """Walk the config dict for a dotted key.
+
+        Args:
+            key: Configuration key in dot notation
+
+        Returns:
+            Configuration value, or _MISSING if any part of the path is absent
+        """
         value = self.config
 
-        for k in keys:
+        for k in key.split('.'):
             if isinstance(value, dict):
                 value = value.get(k)
                 if value is None:
-                    return default
+                    return _MISSING
             else:
-                return default
+                return _MISSING
 
         return value
 
@@ -122,4 +196,7 @@ class Config:
         if self.config['retention_days'] < 1:
             raise ValueError("retention_days must be at least 1 day")
 
+        if self.get('database.flush_every', 1) < 1:
+            raise ValueError("database.flush_every must be at least 1 collection")
+
         return True
@@ -2,13 +2,154 @@
 
 import sqlite3
 import logging
+from collections import namedtuple
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Optional
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+# STRICT tables (SQLite 3.37+) store numeric columns as native integers and
+# doubles instead of applying type affinity to every value
+STRICT_TABLES_SUPPORTED = sqlite3.sqlite_version_info >= (3, 37, 0)
+
+# One sample per metrics table, with fields in the same order as the columns
+# of its INSERT statement so a row binds directly as the parameter sequence
+SystemMetricsRow = namedtuple('SystemMetricsRow', [
+    'timestamp', 'cpu_percent', 'cpu_count',
+    'load_avg_1', 'load_avg_5', 'load_avg_15',
+    'memory_total', 'memory_available', 'memory_percent', 'memory_used',
+    'swap_total', 'swap_used', 'swap_percent',
+])
+
+DiskMetricsRow = namedtuple('DiskMetricsRow', [
+    'timestamp', 'device', 'mountpoint',
+    'total', 'used', 'free', 'percent',
+])
+
+TemperatureMetricsRow = namedtuple('TemperatureMetricsRow', [
+    'timestamp', 'sensor_name', 'label',
+    'current', 'high', 'critical',
+])
+
+GpuMetricsRow = namedtuple('GpuMetricsRow', [
+    'timestamp', 'gpu_index', 'gpu_name',
+    'gpu_utilization', 'memory_utilization',
+    'memory_total', 'memory_used', 'memory_free',
+    'temperature', 'power_draw', 'power_limit', 'fan_speed',
+])
 
 
 class MetricsDatabase:
     """Handles SQLite database operations for metrics storage."""
 
+    # Column definitions for each metrics table
+    TABLE_SCHEMAS: Dict[str, str] = {
+        'system_metrics': """
+            id INTEGER PRIMARY KEY,
+            timestamp INTEGER NOT NULL,
+            cpu_percent REAL NOT NULL,
+            cpu_count INTEGER NOT NULL,
+            load_avg_1 REAL,
+            load_avg_5 REAL,
+            load_avg_15 REAL,
+            memory_total INTEGER NOT NULL,
+            memory_available INTEGER NOT NULL,
+            memory_percent REAL NOT NULL,
+            memory_used INTEGER NOT NULL,
+            swap_total INTEGER NOT NULL,
+            swap_used INTEGER NOT NULL,
+            swap_percent REAL NOT NULL
+        """,
+        'disk_metrics': """
+            id INTEGER PRIMARY KEY,
+            timestamp INTEGER NOT NULL,
+            device TEXT NOT NULL,
+            mountpoint TEXT NOT NULL,
+            total INTEGER NOT NULL,
+            used INTEGER NOT NULL,
+            free INTEGER NOT NULL,
+            percent REAL NOT NULL
+        """,
+        'temperature_metrics': """
+            id INTEGER PRIMARY KEY,
+            timestamp INTEGER NOT NULL,
+            sensor_name TEXT NOT NULL,
+            label TEXT NOT NULL,
+            current REAL NOT NULL,
+            high REAL,
+            critical REAL
+        """,
+        'gpu_metrics': """
+            id INTEGER PRIMARY KEY,
+            timestamp INTEGER NOT NULL,
+            gpu_index INTEGER NOT NULL,
+            gpu_name TEXT NOT NULL,
+            gpu_utilization REAL NOT NULL,
+            memory_utilization REAL NOT NULL,
+            memory_total INTEGER NOT NULL,
+            memory_used INTEGER NOT NULL,
+            memory_free INTEGER NOT NULL,
+            temperature REAL,
+            power_draw REAL,
+            power_limit REAL,
+            fan_speed REAL
+        """,
+    }
+
+    # Time column checked against the retention cutoff, per table
+    RETENTION_COLUMNS: Dict[str, str] = {
+        'system_metrics': 'timestamp',
+        'disk_metrics': 'timestamp',
+        'temperature_metrics': 'timestamp',
+        'gpu_metrics': 'timestamp',
+        'system_metrics_1m': 'bucket',
+        'system_metrics_1h': 'bucket',
+    }
+
+    # Bucket width in seconds of each system_metrics rollup table
+    ROLLUP_SECONDS: Dict[str, int] = {
+        'system_metrics_1m': 60,
+        'system_metrics_1h': 3600,
+    }
+
+    # Rows removed per DELETE during cleanup_old_data
+    CLEANUP_BATCH_SIZE = 5000
+
+    # Insert statements are kept as fixed strings so each one is compiled
+    # once and then served from the connection's statement cache
+    _INSERT_SYSTEM_SQL = """
+        INSERT INTO system_metrics (
+            timestamp, cpu_percent, cpu_count,
+            load_avg_1, load_avg_5, load_avg_15,
+            memory_total, memory_available, memory_percent, memory_used,
+            swap_total, swap_used, swap_percent
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
+    _INSERT_DISK_SQL = """
+        INSERT INTO disk_metrics (
+            timestamp, device, mountpoint,
+            total, used, free, percent
+        ) VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+
+    _INSERT_TEMPERATURE_SQL = """
+        INSERT INTO temperature_metrics (
+            timestamp, sensor_name, label,
+            current, high, critical
+        ) VALUES (?, ?, ?, ?, ?, ?)
+    """
+
+    _INSERT_GPU_SQL = """
+        INSERT INTO gpu_metrics (
+            timestamp, gpu_index, gpu_name,
+            gpu_utilization, memory_utilization,
+            memory_total, memory_used, memory_free,
+            temperature, power_draw, power_limit, fan_speed
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
     def __init__(self, db_path: str):
         """Initialize database connection.
 
@@ -18,272 +159,431 @@ class MetricsDatabase:
         self.db_path = db_path
         self.conn: Optional[sqlite3.Connection] = None
         self.logger = logging.getLogger(__name__)
+        self._cleanup_plans_logged = False
 
     def connect(self):
         """Establish database connection and create tables if needed."""
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # Autocommit mode: transactions are opened explicitly with begin().
+            # The tracker hands the connection to its writer thread after setup,
+            # so it is used by one thread at a time but not always the creator.
+            # Opened by URI so the access mode is explicit (read-write, create).
+            self.conn = sqlite3.connect(
+                Path(self.db_path).absolute().as_uri() + "?mode=rwc",
+                uri=True,
+                cached_statements=64,
+                isolation_level=None,
+                check_same_thread=False,
+            )
             self.conn.row_factory = sqlite3.Row
+            self._configure_pragmas()
             self._create_tables()
             self.logger.info(f"Connected to database at {self.db_path}")
         except sqlite3.Error as e:
             self.logger.error(f"Database connection error: {e}")
             raise
 
+    def begin(self):
+        """Open a write transaction.
+
+        The connection runs in autocommit mode, so each insert_* call commits
+        on its own unless it is wrapped in begin()/commit().
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+
+    def commit(self):
+        """Commit the transaction opened by begin()."""
+        self.conn.commit()
+
+    def rollback(self):
+        """Roll back the transaction opened by begin()."""
+        self.conn.rollback()
+
+    @contextmanager
+    def _transaction(self):
+        """Run the enclosed writes in one transaction.
+
+        Joins the caller's transaction if begin() was already called, so a
+        batch of insert_* calls still commits once.
+        """
+        if self.conn.in_transaction:
+            yield
+            return
+
+        self.begin()
+        try:
+            yield
+        except BaseException:
+            self.rollback()
+            raise
+        self.commit()
+
+    def _configure_pragmas(self):
+        """Tune the connection for a single writer with concurrent readers.
+
+        WAL lets readers run alongside inserts and turns each commit into a
+        log append; with synchronous=NORMAL the log is only fsynced at
+        checkpoints. The journal mode is persistent in the database file; the
+        remaining settings apply to this connection only.
+        """
+        cursor = self.conn.cursor()
+
+        journal_mode = cursor.execute("PRAGMA journal_mode=WAL").fetchone()[0]
+        if journal_mode.lower() != 'wal':
+            self.logger.warning(f"WAL journal mode unavailable, using {journal_mode}")
+
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-8000")
+        cursor.execute("PRAGMA busy_timeout=5000")
+
+        # Read pages through a 256MB memory map instead of read() calls; a
+        # no-op where SQLite was built without mmap support
+        cursor.execute("PRAGMA mmap_size=268435456")
+
     def _create_tables(self):
         """Create necessary tables if they don't exist."""
         cursor = self.conn.cursor()
 
-        # System metrics table
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS system_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME NOT NULL,
-                cpu_percent REAL NOT NULL,
-                cpu_count INTEGER NOT NULL,
-                load_avg_1 REAL,
-                load_avg_5 REAL,
-                load_avg_15 REAL,
-                memory_total INTEGER NOT NULL,
-                memory_available INTEGER NOT NULL,
-                memory_percent REAL NOT NULL,
-                memory_used INTEGER NOT NULL,
-                swap_total INTEGER NOT NULL,
-                swap_used INTEGER NOT NULL,
-                swap_percent REAL NOT NULL
-            )
-        """)
+        self.begin()
+        for table, columns in self.TABLE_SCHEMAS.items():
+            cursor.execute(self._table_ddl(table, columns))
+
+        self._migrate_timestamps(cursor)
+        self.commit()
+
+        self._rebuild_outdated_tables(cursor)
 
-        # Create index on timestamp for faster queries
+        self.begin()
+
+        # Create indexes on timestamp for faster queries
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_timestamp
             ON system_metrics(timestamp)
         """)
 
-        # Disk metrics table
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS disk_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME NOT NULL,
-                device TEXT NOT NULL,
-                mountpoint TEXT NOT NULL,
-                total INTEGER NOT NULL,
-                used INTEGER NOT NULL,
-                free INTEGER NOT NULL,
-                percent REAL NOT NULL
-            )
+            CREATE INDEX IF NOT EXISTS idx_disk_timestamp
+            ON disk_metrics(timestamp)
         """)
 
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_disk_timestamp
-            ON disk_metrics(timestamp)
+            CREATE INDEX IF NOT EXISTS idx_temp_timestamp
+            ON temperature_metrics(timestamp)
         """)
 
-        # Temperature metrics table
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS temperature_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME NOT NULL,
-                sensor_name TEXT NOT NULL,
-                label TEXT NOT NULL,
-                current REAL NOT NULL,
-                high REAL,
-                critical REAL
-            )
+            CREATE INDEX IF NOT EXISTS idx_gpu_timestamp
+            ON gpu_metrics(timestamp)
         """)
 
+        # Composite indexes backing the peak and latest-per-key queries
+        # issued by analysis/query_metrics.py and scripts/query.py
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_temp_timestamp
-            ON temperature_metrics(timestamp)
+            CREATE INDEX IF NOT EXISTS idx_sysm_cpu
+            ON system_metrics(cpu_percent DESC, timestamp)
         """)
 
-        # GPU metrics table
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS gpu_metrics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                timestamp DATETIME NOT NULL,
-                gpu_index INTEGER NOT NULL,
-                gpu_name TEXT NOT NULL,
-                gpu_utilization REAL NOT NULL,
-                memory_utilization REAL NOT NULL,
-                memory_total INTEGER NOT NULL,
-                memory_used INTEGER NOT NULL,
-                memory_free INTEGER NOT NULL,
-                temperature REAL,
-                power_draw REAL,
-                power_limit REAL,
-                fan_speed REAL
-            )
+            CREATE INDEX IF NOT EXISTS idx_sysm_mem
+            ON system_metrics(memory_percent DESC, timestamp)
         """)
 
+        # Disk and temperature indexes also carry the displayed columns so
+        # latest-per-key lookups are answered from the index alone
         cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_gpu_timestamp
-            ON gpu_metrics(timestamp)
+            CREATE INDEX IF NOT EXISTS idx_disk_mp_ts
+            ON disk_metrics(mountpoint, timestamp DESC, percent, total, used, free)
         """)
 
-        self.conn.commit()
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_temp_sensor_ts
+            ON temperature_metrics(sensor_name, label, timestamp DESC, current)
+        """)
+
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_gpu_idx_ts
+            ON gpu_metrics(gpu_index, timestamp DESC)
+        """)
+
+        self._create_rollups(cursor)
+
+        self.commit()
+
+        # Gather planner statistics on first run; afterwards let SQLite decide
+        # whether they are stale, which avoids a full ANALYZE on every start
+        has_stats = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).fetchone()
+        cursor.execute("PRAGMA optimize" if has_stats else "ANALYZE")
         self.logger.info("Database tables created/verified")
 
-    def insert_system_metrics(self, metrics: dict):
+    @staticmethod
+    def _table_ddl(name: str, columns: str) -> str:
+        """Build the CREATE TABLE statement for a metrics table.
+
+        Args:
+            name: Name of the table to create
+            columns: Column definitions from TABLE_SCHEMAS
+
+        Returns:
+            CREATE TABLE statement, declared STRICT when supported
+        """
+        strict = " STRICT" if STRICT_TABLES_SUPPORTED else ""
+        return f"CREATE TABLE IF NOT EXISTS {name} ({columns}){strict}"
+
+    def _rebuild_outdated_tables(self, cursor: sqlite3.Cursor):
+        """Rebuild metrics tables created by older versions of the schema.
+
+        Tables are rebuilt when they still use AUTOINCREMENT, which costs a
+        sqlite_sequence update on every insert, or when they predate STRICT
+        on a SQLite version that supports it. Each table is copied into a
+        replacement in its own transaction. Indexes and triggers are dropped
+        along with the old table and recreated afterwards by _create_tables.
+
+        Args:
+            cursor: Cursor on the open connection
+        """
+        for table, columns in self.TABLE_SCHEMAS.items():
+            ddl = cursor.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+            ).fetchone()['sql']
+            needs_strict = (
+                STRICT_TABLES_SUPPORTED
+                and not cursor.execute(f"PRAGMA table_list({table})").fetchone()['strict']
+            )
+            if 'AUTOINCREMENT' not in ddl.upper() and not needs_strict:
+                continue
+
+            new_table = f"{table}_rebuild"
+            try:
+                cursor.execute("BEGIN")
+                cursor.execute(f"DROP TABLE IF EXISTS {new_table}")
+                cursor.execute(self._table_ddl(new_table, columns))
+                column_names = ', '.join(
+                    row['name'] for row in cursor.execute(f"PRAGMA table_info({new_table})").fetchall()
+                )
+                cursor.execute(
+                    f"INSERT INTO {new_table} ({column_names}) SELECT {column_names} FROM {table}"
+                )
+                copied = cursor.rowcount
+                cursor.execute(f"DROP TABLE {table}")
+                cursor.execute(f"ALTER TABLE {new_table} RENAME TO {table}")
+                self.conn.commit()
+                self.logger.info(f"Rebuilt {table} with the current schema ({copied} rows)")
+            except sqlite3.Error as e:
+                self.conn.rollback()
+                self.logger.warning(f"Could not rebuild {table} with the current schema: {e}")
+
+    def _migrate_timestamps(self, cursor: sqlite3.Cursor):
+        """Convert legacy ISO-8601 text timestamps to Unix epoch seconds.
+
+        Older versions stored naive local-time strings. Integers always sort
+        before text in SQLite, so ``timestamp >= ''`` selects exactly the
+        legacy rows through the timestamp index without a full scan.
+
+        Args:
+            cursor: Cursor on the open connection
+        """
+        for table in ('system_metrics', 'disk_metrics', 'temperature_metrics', 'gpu_metrics'):
+            cursor.execute(f"""
+                UPDATE {table}
+                SET timestamp = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+                WHERE timestamp >= ''
+            """)
+            if cursor.rowcount > 0:
+                self.logger.info(
+                    f"Migrated {cursor.rowcount} {table} timestamps to epoch seconds"
+                )
+
+    def _create_rollups(self, cursor: sqlite3.Cursor):
+        """Create the system metrics rollups and their insert triggers.
+
+        Each bucket holds sums, maxima and sample counts for one minute or
+        one hour (see ROLLUP_SECONDS) so long-window averages and peaks scan
+        one row per bucket instead of one per sample. Existing history is
+        backfilled when a rollup table is new.
+
+        Args:
+            cursor: Cursor on the open connection
+        """
+        for rollup, seconds in self.ROLLUP_SECONDS.items():
+            cursor.execute(f"""
+                CREATE TABLE IF NOT EXISTS {rollup} (
+                    bucket INTEGER PRIMARY KEY,
+                    sum_cpu REAL NOT NULL,
+                    max_cpu REAL NOT NULL,
+                    sum_memory REAL NOT NULL,
+                    max_memory REAL NOT NULL,
+                    sum_load REAL NOT NULL,
+                    load_samples INTEGER NOT NULL,
+                    samples INTEGER NOT NULL
+                )
+            """)
+
+            cursor.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{rollup}
+                AFTER INSERT ON system_metrics
+                BEGIN
+                    INSERT INTO {rollup} (
+                        bucket, sum_cpu, max_cpu, sum_memory, max_memory,
+                        sum_load, load_samples, samples
+                    ) VALUES (
+                        NEW.timestamp / {seconds} * {seconds},
+                        NEW.cpu_percent, NEW.cpu_percent,
+                        NEW.memory_percent, NEW.memory_percent,
+                        COALESCE(NEW.load_avg_1, 0), NEW.load_avg_1 IS NOT NULL, 1
+                    )
+                    ON CONFLICT(bucket) DO UPDATE SET
+                        sum_cpu = sum_cpu + excluded.sum_cpu,
+                        max_cpu = MAX(max_cpu, excluded.max_cpu),
+                        sum_memory = sum_memory + excluded.sum_memory,
+                        max_memory = MAX(max_memory, excluded.max_memory),
+                        sum_load = sum_load + excluded.sum_load,
+                        load_samples = load_samples + excluded.load_samples,
+                        samples = samples + 1;
+                END
+            """)
+
+            # Backfill from raw samples the first time the rollup is created
+            if cursor.execute(f"SELECT 1 FROM {rollup} LIMIT 1").fetchone() is None:
+                cursor.execute(f"""
+                    INSERT INTO {rollup} (
+                        bucket, sum_cpu, max_cpu, sum_memory, max_memory,
+                        sum_load, load_samples, samples
+                    )
+                    SELECT
+                        timestamp / {seconds} * {seconds},
+                        SUM(cpu_percent), MAX(cpu_percent),
+                        SUM(memory_percent), MAX(memory_percent),
+                        TOTAL(load_avg_1), COUNT(load_avg_1), COUNT(*)
+                    FROM system_metrics
+                    GROUP BY timestamp / {seconds}
+                """)
+                if cursor.rowcount > 0:
+                    self.logger.info(f"Backfilled {cursor.rowcount} {rollup} buckets")
+
+    def insert_system_metrics(self, metrics: SystemMetricsRow):
         """Insert system metrics into database.
 
         Args:
-            metrics: Dictionary containing system metrics
+            metrics: System metrics sample
         """
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("""
-                INSERT INTO system_metrics (
-                    timestamp, cpu_percent, cpu_count,
-                    load_avg_1, load_avg_5, load_avg_15,
-                    memory_total, memory_available, memory_percent, memory_used,
-                    swap_total, swap_used, swap_percent
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                metrics['timestamp'],
-                metrics['cpu_percent'],
-                metrics['cpu_count'],
-                metrics['load_avg_1'],
-                metrics['load_avg_5'],
-                metrics['load_avg_15'],
-                metrics['memory_total'],
-                metrics['memory_available'],
-                metrics['memory_percent'],
-                metrics['memory_used'],
-                metrics['swap_total'],
-                metrics['swap_used'],
-                metrics['swap_percent']
-            ))
-            self.conn.commit()
+            self.conn.execute(self._INSERT_SYSTEM_SQL, metrics)
         except sqlite3.Error as e:
             self.logger.error(f"Error inserting system metrics: {e}")
             raise
 
-    def insert_disk_metrics(self, metrics_list: list):
+    def insert_disk_metrics(self, metrics_list: List[DiskMetricsRow]):
         """Insert disk metrics into database.
 
         Args:
-            metrics_list: List of disk metric dictionaries
+            metrics_list: List of disk metrics samples
         """
         try:
-            cursor = self.conn.cursor()
-            for metrics in metrics_list:
-                cursor.execute("""
-                    INSERT INTO disk_metrics (
-                        timestamp, device, mountpoint,
-                        total, used, free, percent
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    metrics['timestamp'],
-                    metrics['device'],
-                    metrics['mountpoint'],
-                    metrics['total'],
-                    metrics['used'],
-                    metrics['free'],
-                    metrics['percent']
-                ))
-            self.conn.commit()
+            with self._transaction():
+                self.conn.executemany(self._INSERT_DISK_SQL, metrics_list)
         except sqlite3.Error as e:
             self.logger.error(f"Error inserting disk metrics: {e}")
             raise
 
-    def insert_temperature_metrics(self, metrics_list: list):
+    def insert_temperature_metrics(self, metrics_list: List[TemperatureMetricsRow]):
         """Insert temperature metrics into database.
 
         Args:
-            metrics_list: List of temperature metric dictionaries
+            metrics_list: List of temperature metrics samples
         """
         try:
-            cursor = self.conn.cursor()
-            for metrics in metrics_list:
-                cursor.execute("""
-                    INSERT INTO temperature_metrics (
-                        timestamp, sensor_name, label,
-                        current, high, critical
-                    ) VALUES (?, ?, ?, ?, ?, ?)
-                """, (
-                    metrics['timestamp'],
-                    metrics['sensor_name'],
-                    metrics['label'],
-                    metrics['current'],
-                    metrics['high'],
-                    metrics['critical']
-                ))
-            self.conn.commit()
+            with self._transaction():
+                self.conn.executemany(self._INSERT_TEMPERATURE_SQL, metrics_list)
         except sqlite3.Error as e:
             self.logger.error(f"Error inserting temperature metrics: {e}")
             raise
 
-    def insert_gpu_metrics(self, metrics_list: list):
+    def insert_gpu_metrics(self, metrics_list: List[GpuMetricsRow]):
         """Insert GPU metrics into database.
 
         Args:
-            metrics_list: List of GPU metric dictionaries
+            metrics_list: List of GPU metrics samples
         """
         try:
-            cursor = self.conn.cursor()
-            for metrics in metrics_list:
-                cursor.execute("""
-                    INSERT INTO gpu_metrics (
-                        timestamp, gpu_index, gpu_name,
-                        gpu_utilization, memory_utilization,
-                        memory_total, memory_used, memory_free,
-                        temperature, power_draw, power_limit, fan_speed
-                    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                """, (
-                    metrics['timestamp'],
-                    metrics['gpu_index'],
-                    metrics['gpu_name'],
-                    metrics['gpu_utilization'],
-                    metrics['memory_utilization'],
-                    metrics['memory_total'],
-                    metrics['memory_used'],
-                    metrics['memory_free'],
-                    metrics['temperature'],
-                    metrics['power_draw'],
-                    metrics['power_limit'],
-                    metrics['fan_speed']
-                ))
-            self.conn.commit()
+            with self._transaction():
+                self.conn.executemany(self._INSERT_GPU_SQL, metrics_list)
         except sqlite3.Error as e:
             self.logger.error(f"Error inserting GPU metrics: {e}")
             raise
 
-    def cleanup_old_data(self, retention_days: int):
-        """Remove data older than retention period.
+    def flush(self, system_metrics: List[SystemMetricsRow], disk_metrics: List[DiskMetricsRow],
+              temperature_metrics: List[TemperatureMetricsRow], gpu_metrics: List[GpuMetricsRow]):
+        """Write several collection intervals of buffered metrics at once.
+
+        All rows go in under a single BEGIN IMMEDIATE transaction, so a
+        flush costs one commit however many intervals it covers.
 
         Args:
-            retention_days: Number of days to retain data
+            system_metrics: List of system metrics samples
+            disk_metrics: List of disk metrics samples
+            temperature_metrics: List of temperature metrics samples
+            gpu_metrics: List of GPU metrics samples
         """
         try:
-            cutoff_date = datetime.now() - timedelta(days=retention_days)
             cursor = self.conn.cursor()
+            with self._transaction():
+                cursor.executemany(self._INSERT_SYSTEM_SQL, system_metrics)
+                cursor.executemany(self._INSERT_DISK_SQL, disk_metrics)
+                cursor.executemany(self._INSERT_TEMPERATURE_SQL, temperature_metrics)
+                cursor.executemany(self._INSERT_GPU_SQL, gpu_metrics)
+        except sqlite3.Error as e:
+            self.logger.error(f"Error flushing buffered metrics: {e}")
+            raise
 
-            cursor.execute(
-                "DELETE FROM system_metrics WHERE timestamp < ?",
-                (cutoff_date,)
-            )
-            deleted_system = cursor.rowcount
-
-            cursor.execute(
-                "DELETE FROM disk_metrics WHERE timestamp < ?",
-                (cutoff_date,)
-            )
-            deleted_disk = cursor.rowcount
+    def cleanup_old_data(self, retention_days: int):
+        """Remove data older than retention period.
 
-            cursor.execute(
-                "DELETE FROM temperature_metrics WHERE timestamp < ?",
-                (cutoff_date,)
-            )
-            deleted_temp = cursor.rowcount
+        Rows are deleted in batches of CLEANUP_BATCH_SIZE, each committed on
+        its own, so a large backlog never holds the write lock or grows the
+        WAL for the whole cleanup.
 
-            cursor.execute(
-                "DELETE FROM gpu_metrics WHERE timestamp < ?",
-                (cutoff_date,)
-            )
-            deleted_gpu = cursor.rowcount
+        Args:
+            retention_days: Number of days to retain data
+        """
+        try:
+            cutoff_date = int((datetime.now() - timedelta(days=retention_days)).timestamp())
+            cursor = self.conn.cursor()
 
-            self.conn.commit()
+            log_plans = not self._cleanup_plans_logged and self.logger.isEnabledFor(logging.DEBUG)
+
+            deleted = {}
+            for table, column in self.RETENTION_COLUMNS.items():
+                sql = f"""
+                    DELETE FROM {table} WHERE rowid IN (
+                        SELECT rowid FROM {table} WHERE {column} < ? LIMIT {self.CLEANUP_BATCH_SIZE}
+                    )
+                """
+
+                # Show once which index each cleanup DELETE is planned on
+                if log_plans:
+                    plan = cursor.execute(f"EXPLAIN QUERY PLAN {sql}", (cutoff_date,)).fetchall()
+                    self.logger.debug(
+                        f"Cleanup plan for {table}: " + "; ".join(row['detail'] for row in plan)
+                    )
+
+                deleted[table] = 0
+                while True:
+                    # Autocommit: each batch is its own transaction
+                    batch = cursor.execute(sql, (cutoff_date,)).rowcount
+                    deleted[table] += batch
+                    if batch < self.CLEANUP_BATCH_SIZE:
+                        break
+
+            if log_plans:
+                self._cleanup_plans_logged = True
+
+            deleted_system = deleted['system_metrics']
+            deleted_disk = deleted['disk_metrics']
+            deleted_temp = deleted['temperature_metrics']
+            deleted_gpu = deleted['gpu_metrics']
 
             if deleted_system > 0 or deleted_disk > 0 or deleted_temp > 0 or deleted_gpu > 0:
                 self.logger.info(
@@ -294,6 +594,31 @@ class MetricsDatabase:
         except sqlite3.Error as e:
             self.logger.error(f"Error cleaning up old data: {e}")
 
+    def maintenance(self):
+        """Checkpoint the WAL and refresh planner statistics.
+
+        Meant to run after the daily cleanup: the TRUNCATE checkpoint folds
+        the WAL back into the database and resets it to zero length, and
+        PRAGMA optimize re-analyzes any tables whose statistics went stale.
+        """
+        try:
+            busy, log_frames, checkpointed = self.conn.execute(
+                "PRAGMA wal_checkpoint(TRUNCATE)"
+            ).fetchone()
+            # The frame counts are only informative when a reader blocked the
+            # checkpoint; a completed TRUNCATE reports them as zero
+            if busy:
+                self.logger.warning(
+                    f"WAL checkpoint blocked by a reader: {checkpointed} of "
+                    f"{log_frames} frames checkpointed"
+                )
+            else:
+                self.logger.info("WAL checkpointed and truncated")
+
+            self.conn.execute("PRAGMA optimize")
+        except sqlite3.Error as e:
+            self.logger.error(f"Error during database maintenance: {e}")
+
     def close(self):
         """Close database connection."""
         if self.conn:
@@ -6,6 +6,9 @@ import sys
 import time
 import logging
 import os
+import queue
+import sqlite3
+import threading
 from pathlib import Path
 from logging.handlers import RotatingFileHandler
 
@@ -13,6 +16,10 @@ from config import Config
 from collector import MetricsCollector
 from database import MetricsDatabase
 
+# Rows per table the writer holds on to while the database is unavailable;
+# the oldest are dropped beyond this
+MAX_UNWRITTEN_ROWS = 10000
+
 
 class UtilizationTracker:
     """Main tracker daemon that orchestrates metrics collection."""
@@ -30,6 +37,25 @@ class UtilizationTracker:
         self.collector = MetricsCollector()
         self.db = None
 
+        # Which collectors run each tick; the config does not change after load
+        self._collect_system = bool(self.config.get('metrics.cpu') or self.config.get('metrics.memory'))
+        self._collect_disk = bool(self.config.get('metrics.disk'))
+        self._collect_temp = bool(self.config.get('metrics.temperature'))
+        self._collect_gpu = bool(self.config.get('metrics.gpu'))
+
+        # Collected metrics waiting to be written; flushed every flush_every ticks
+        self.flush_every = self.config.get('database.flush_every', 1)
+        self._system_buffer = []
+        self._disk_buffer = []
+        self._temp_buffer = []
+        self._gpu_buffer = []
+        self._buffered_ticks = 0
+
+        # Database writes run on a background thread so slow commits never
+        # delay the next collection; None on the queue stops the writer
+        self._write_queue = queue.Queue(maxsize=1024)
+        self._writer = None
+
         self._setup_logging()
         self._setup_signal_handlers()
 
@@ -60,12 +86,14 @@ class UtilizationTracker:
         )
         logger.addHandler(file_handler)
 
-        # Console handler
-        console_handler = logging.StreamHandler()
-        console_handler.setFormatter(
-            logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        )
-        logger.addHandler(console_handler)
+        # Console handler: always when attached to a terminal; under a
+        # service manager only if logging.console asks for the duplicate copy
+        if sys.stderr.isatty() or self.config.get('logging.console', False):
+            console_handler = logging.StreamHandler()
+            console_handler.setFormatter(
+                logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+            )
+            logger.addHandler(console_handler)
 
         self.logger = logging.getLogger(__name__)
         self.logger.info("Logging configured")
@@ -98,40 +126,166 @@ class UtilizationTracker:
         self.db.connect()
 
     def _collect_and_store(self):
-        """Collect metrics and store in database."""
+        """Collect metrics and buffer them, flushing to the database when due."""
         try:
+            # One timestamp per tick so every table lines up on the same key
+            timestamp = int(time.time())
+
             # Collect system metrics
-            if self.config.get('metrics.cpu') or self.config.get('metrics.memory'):
-                system_metrics = self.collector.collect_system_metrics()
-                self.db.insert_system_metrics(system_metrics)
+            if self._collect_system:
+                self._system_buffer.append(self.collector.collect_system_metrics(timestamp))
 
             # Collect disk metrics
-            if self.config.get('metrics.disk'):
-                disk_metrics = self.collector.collect_disk_metrics()
-                if disk_metrics:
-                    self.db.insert_disk_metrics(disk_metrics)
+            if self._collect_disk:
+                self._disk_buffer.extend(self.collector.collect_disk_metrics(timestamp))
 
             # Collect temperature metrics
-            if self.config.get('metrics.temperature'):
-                temp_metrics = self.collector.collect_temperature_metrics()
-                if temp_metrics:
-                    self.db.insert_temperature_metrics(temp_metrics)
+            if self._collect_temp:
+                self._temp_buffer.extend(self.collector.collect_temperature_metrics(timestamp))
 
             # Collect GPU metrics
-            if self.config.get('metrics.gpu'):
-                gpu_metrics = self.collector.collect_gpu_metrics()
-                if gpu_metrics:
-                    self.db.insert_gpu_metrics(gpu_metrics)
+            if self._collect_gpu:
+                self._gpu_buffer.extend(self.collector.collect_gpu_metrics(timestamp))
+
+            self._buffered_ticks += 1
+            if self._buffered_ticks >= self.flush_every:
+                self._flush_buffers()
 
             self.logger.debug("Metrics collected and stored successfully")
 
         except Exception as e:
             self.logger.error(f"Error during metrics collection: {e}", exc_info=True)
 
+    def _flush_buffers(self, block: bool = False):
+        """Hand all buffered metrics to the writer thread as one transaction.
+
+        Args:
+            block: Wait for room in the write queue instead of keeping the
+                metrics buffered until the next flush
+        """
+        if self._buffered_ticks == 0:
+            return
+
+        queued = self._enqueue_write(
+            'flush', (self._system_buffer, self._disk_buffer, self._temp_buffer, self._gpu_buffer),
+            block=block
+        )
+        if not queued:
+            return
+
+        self._system_buffer = []
+        self._disk_buffer = []
+        self._temp_buffer = []
+        self._gpu_buffer = []
+        self._buffered_ticks = 0
+
     def _cleanup_old_data(self):
         """Periodically cleanup old data based on retention policy."""
         retention_days = self.config.get('retention_days', 30)
-        self.db.cleanup_old_data(retention_days)
+        self._enqueue_write('cleanup', retention_days)
+        self._enqueue_write('maintenance', None)
+
+    def _enqueue_write(self, kind: str, payload, block: bool = False) -> bool:
+        """Queue a database operation for the writer thread.
+
+        Args:
+            kind: 'flush' for buffered metrics, 'cleanup' for retention or
+                'maintenance' for the post-cleanup checkpoint
+            payload: Arguments for the operation
+            block: Wait for room in the queue rather than giving up when full
+
+        Returns:
+            True if the operation was queued
+        """
+        try:
+            self._write_queue.put((kind, payload), block=block)
+            return True
+        except queue.Full:
+            self.logger.warning(f"Database write queue full, could not queue {kind} request")
+            return False
+
+    def _writer_loop(self):
+        """Apply queued database operations until the stop sentinel arrives.
+
+        Metrics from a flush that fails with a transient database error are
+        kept and written together with the next flush, and once more before
+        exiting.
+        """
+        # System, disk, temperature and GPU rows not yet committed
+        unwritten = ([], [], [], [])
+
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                break
+
+            kind, payload = item
+            try:
+                if kind == 'flush':
+                    for rows, new_rows in zip(unwritten, payload):
+                        rows.extend(new_rows)
+                        if len(rows) > MAX_UNWRITTEN_ROWS:
+                            self.logger.warning(
+                                f"Dropping {len(rows) - MAX_UNWRITTEN_ROWS} oldest unwritten metric rows"
+                            )
+                            del rows[:-MAX_UNWRITTEN_ROWS]
+                    self._write_unwritten(unwritten)
+                elif kind == 'cleanup':
+                    self.db.cleanup_old_data(payload)
+                elif kind == 'maintenance':
+                    self.db.maintenance()
+            except Exception as e:
+                self.logger.error(f"Error writing {kind} to database: {e}", exc_info=True)
+
+        if any(unwritten):
+            try:
+                self._write_unwritten(unwritten)
+            except Exception as e:
+                self.logger.error(f"Error writing buffered metrics on shutdown, discarding them: {e}")
+
+    def _write_unwritten(self, unwritten):
+        """Commit the writer's pending metrics, keeping them if the write may succeed later.
+
+        Args:
+            unwritten: (system, disk, temperature, gpu) lists of pending rows;
+                emptied once they are committed or rejected
+
+        Raises:
+            sqlite3.OperationalError: If the database is busy, locked, full
+                or failing I/O; the rows stay pending
+            Exception: Any other failure; the rows are discarded
+        """
+        try:
+            self.db.flush(*unwritten)
+        except sqlite3.OperationalError:
+            pending = sum(len(rows) for rows in unwritten)
+            self.logger.warning(f"Keeping {pending} unwritten metric rows for the next flush")
+            raise
+        except Exception:
+            # Constraint violations and bad values fail the same way on every
+            # retry, and would block all later rows with them
+            pending = sum(len(rows) for rows in unwritten)
+            self.logger.warning(f"Discarding {pending} metric rows the database rejected")
+            for rows in unwritten:
+                rows.clear()
+            raise
+
+        for rows in unwritten:
+            rows.clear()
+
+    def _start_writer(self):
+        """Start the background database writer thread."""
+        self._writer = threading.Thread(target=self._writer_loop, name='db-writer', daemon=True)
+        self._writer.start()
+
+    def _stop_writer(self):
+        """Drain the write queue and wait for the writer thread to exit."""
+        if self._writer is None:
+            return
+
+        self._write_queue.put(None)
+        self._writer.join()
+        self._writer = None
 
     def run(self):
         """Main run loop for the tracker."""
@@ -143,6 +297,7 @@ class UtilizationTracker:
 
         # Setup database
         self._setup_database()
+        self._start_writer()
 
         # Get collection interval
         interval = self.config.get('collection_interval', 60)
@@ -151,31 +306,39 @@ class UtilizationTracker:
         self.running = True
         collection_count = 0
         cleanup_interval = 86400  # Cleanup once per day
-        last_cleanup = time.time()
+        last_cleanup = time.monotonic()
+
+        # Ticks are scheduled on the monotonic clock against fixed targets so
+        # wall-clock jumps and per-tick jitter don't shift the cadence;
+        # wall-clock time is only used for the stored timestamps
+        next_tick = time.monotonic()
 
         try:
             while self.running:
-                start_time = time.time()
+                start_time = time.monotonic()
 
                 # Collect and store metrics
                 self._collect_and_store()
                 collection_count += 1
 
                 # Periodic cleanup (once per day)
-                if time.time() - last_cleanup > cleanup_interval:
+                if time.monotonic() - last_cleanup > cleanup_interval:
                     self._cleanup_old_data()
-                    last_cleanup = time.time()
+                    last_cleanup = time.monotonic()
 
-                # Calculate sleep time to maintain consistent interval
-                elapsed = time.time() - start_time
-                sleep_time = max(0, interval - elapsed)
+                # Sleep until the next target tick
+                next_tick += interval
+                now = time.monotonic()
+                sleep_time = next_tick - now
 
                 if sleep_time > 0:
                     time.sleep(sleep_time)
                 else:
                     self.logger.warning(
-                        f"Collection took {elapsed:.2f}s, longer than interval {interval}s"
+                        f"Collection took {now - start_time:.2f}s, longer than interval {interval}s"
                     )
+                    # Start over from now rather than firing a burst of late ticks
+                    next_tick = now
 
         except KeyboardInterrupt:
             self.logger.info("Interrupted by user")
@@ -189,6 +352,9 @@ class UtilizationTracker:
         """Cleanup and shutdown tracker."""
         self.logger.info("Shutting down tracker")
         if self.db:
+            # Queue whatever is still buffered, then let the writer finish
+            self._flush_buffers(block=True)
+            self._stop_writer()
             self.db.close()
         self.logger.info("Tracker stopped")
 